@@ -1,85 +1,205 @@
+import functools
+import hashlib
 import os
-import json
-import nbformat
+import re
+import orjson
 import requests
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+
+@functools.lru_cache(maxsize=None)
+def get_template_env(template_dir='templates'):
+    """
+    Build the Jinja2 environment once per process
+
+    Compiled templates are also cached on disk so repeated runs skip
+    the parse/compile step entirely.
+
+    :param template_dir: Directory containing the Jinja2 templates
+    :return: Shared Environment instance
+    """
+    # jinja2 does not create the bytecode cache directory itself
+    os.makedirs('.jinja_cache', exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        bytecode_cache=FileSystemBytecodeCache('.jinja_cache'),
+        auto_reload=False,
+        cache_size=-1,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+
+def cell_source(cell):
+    """
+    Return a cell's source as a single string
+
+    The notebook format allows source to be either a string or a
+    list of lines.
+
+    :param cell: Cell dictionary from a parsed notebook
+    :return: Cell source text
+    """
+    src = cell.get('source', '')
+    return ''.join(src) if isinstance(src, list) else src
+
+# ML type detection keywords, compiled into a single pattern so each
+# cell is scanned once instead of once per keyword
+_ML_TYPE_KEYWORDS = {
+    'sklearn.classification': 'classification',
+    'logistic_regression': 'classification',
+    'sklearn.regression': 'regression',
+    'linear_regression': 'regression',
+    'tensorflow': 'neural_network',
+    'keras': 'neural_network',
+    'pytorch': 'neural_network',
+    'kmeans': 'clustering',
+    'dbscan': 'clustering'
+}
+_ML_TYPE_RE = re.compile(
+    '|'.join(re.escape(keyword) for keyword in _ML_TYPE_KEYWORDS),
+    re.IGNORECASE
+)
 
 class SiteGenerator:
-    def __init__(self, notebooks_dir='sample_notebooks', output_dir='docs'):
+    def __init__(self, notebooks_dir='sample_notebooks', output_dir='docs',
+                 cache_path='.site_cache.json'):
         """
         Initialize site generator
-        
+
         :param notebooks_dir: Directory containing sample notebooks
         :param output_dir: Output directory for generated site
+        :param cache_path: Persistent cache of processed notebook metadata
         """
         self.notebooks_dir = notebooks_dir
         self.output_dir = output_dir
+        self.cache_path = cache_path
+        self._site_cache = self._load_site_cache()
         
         # Ensure directories exist
         os.makedirs(self.notebooks_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Setup Jinja2 template environment
-        self.template_env = Environment(loader=FileSystemLoader('templates'))
+        # Setup Jinja2 template environment (shared per process)
+        self.template_env = get_template_env()
+        self._index_tmpl = self.template_env.get_template('index.html')
+        # Bind the notebook page macro once; per-notebook rendering then
+        # skips the full template/context setup
+        self._notebook_page = self.template_env.get_template('notebook.html').module.page
     
     def process_notebooks(self):
         """
         Process all notebooks in the notebooks directory
+
+        Notebooks are independent JSON parses with no shared state, so
+        they are fanned out across a process pool.
         """
-        notebooks = []
-        
         # Create sample notebooks if none exist
-        if not os.listdir(self.notebooks_dir):
-            self._create_sample_notebooks()
-        
-        for filename in os.listdir(self.notebooks_dir):
-            if filename.endswith('.ipynb'):
-                filepath = os.path.join(self.notebooks_dir, filename)
-                notebook_data = self._process_notebook(filepath)
-                notebooks.append(notebook_data)
-        
-        return notebooks
-    
-    def _process_notebook(self, filepath):
+        with os.scandir(self.notebooks_dir) as it:
+            if next(it, None) is None:
+                self._create_sample_notebooks()
+
+        # scandir yields DirEntry objects with cached type info and a
+        # ready-made path, avoiding a join and stat per entry
+        with os.scandir(self.notebooks_dir) as it:
+            filepaths = [
+                entry.path for entry in it
+                if entry.is_file() and entry.name.endswith('.ipynb')
+            ]
+
+        # Serve unchanged notebooks straight from the persistent cache;
+        # only hash misses are re-processed
+        digests = {}
+        misses = []
+        results = {}
+        for filepath in filepaths:
+            with open(filepath, 'rb') as f:
+                digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+            digests[filepath] = digest
+            entry = self._site_cache.get(os.path.basename(filepath))
+            if entry and entry.get('hash') == digest:
+                results[filepath] = entry['metadata']
+            else:
+                misses.append(filepath)
+
+        if len(misses) <= 1:
+            processed = [self._process_notebook(fp) for fp in misses]
+        else:
+            ncpus = os.cpu_count() or 1
+            with ProcessPoolExecutor() as executor:
+                processed = list(executor.map(
+                    self._process_notebook,
+                    misses,
+                    chunksize=max(1, len(misses) // (4 * ncpus))
+                ))
+
+        for filepath, metadata in zip(misses, processed):
+            results[filepath] = metadata
+            self._site_cache[os.path.basename(filepath)] = {
+                'hash': digests[filepath],
+                'metadata': metadata
+            }
+        if misses:
+            self._save_site_cache()
+
+        return [results[filepath] for filepath in filepaths]
+
+    def _load_site_cache(self):
+        """
+        Load the persistent notebook metadata cache
+
+        :return: Cache dictionary keyed by notebook filename
+        """
+        try:
+            with open(self.cache_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+
+    def _save_site_cache(self):
+        """
+        Persist the notebook metadata cache for incremental rebuilds
+        """
+        try:
+            with open(self.cache_path, 'wb') as f:
+                f.write(orjson.dumps(self._site_cache))
+        except OSError as e:
+            print(f"Error saving site cache: {e}")
+
+    @staticmethod
+    def _process_notebook(filepath):
         """
         Process individual notebook
         
         :param filepath: Path to notebook file
         :return: Processed notebook data
         """
-        with open(filepath, 'r', encoding='utf-8') as f:
-            nb = nbformat.read(f, as_version=4)
-        
+        with open(filepath, 'rb') as f:
+            nb = orjson.loads(f.read())
+        cells = nb.get('cells', [])
+
         # Basic notebook metadata extraction
         metadata = {
             'name': os.path.basename(filepath),
-            'cells': len(nb.cells),
-            'ml_type': self._detect_ml_type(nb)
+            'cells': len(cells),
+            'ml_type': SiteGenerator._detect_ml_type(cells)
         }
-        
+
         return metadata
-    
-    def _detect_ml_type(self, notebook):
+
+    @staticmethod
+    def _detect_ml_type(cells):
         """
-        Detect machine learning type from notebook
-        
-        :param notebook: Parsed notebook object
+        Detect machine learning type from notebook cells
+
+        :param cells: List of cell dictionaries
         :return: Detected ML type
         """
-        ml_types = {
-            'classification': ['sklearn.classification', 'logistic_regression'],
-            'regression': ['sklearn.regression', 'linear_regression'],
-            'neural_network': ['tensorflow', 'keras', 'pytorch'],
-            'clustering': ['kmeans', 'dbscan']
-        }
-        
-        for cell in notebook.cells:
-            if cell.cell_type == 'code':
-                cell_text = cell.source.lower()
-                for ml_type, keywords in ml_types.items():
-                    if any(keyword in cell_text for keyword in keywords):
-                        return ml_type
-        
+        for cell in cells:
+            if cell.get('cell_type') == 'code':
+                match = _ML_TYPE_RE.search(cell_source(cell))
+                if match:
+                    return _ML_TYPE_KEYWORDS[match.group(0).lower()]
+
         return 'unknown'
     
     def _create_sample_notebooks(self):
@@ -106,8 +226,8 @@ class SiteGenerator:
         
         for sample in sample_notebooks:
             filepath = os.path.join(self.notebooks_dir, sample['filename'])
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(sample['content'], f)
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(sample['content']))
     
     def generate_site(self):
         """
@@ -115,24 +235,34 @@ class SiteGenerator:
         """
         # Process notebooks
         notebooks = self.process_notebooks()
-        
-        # Generate index page
-        index_template = self.template_env.get_template('index.html')
-        index_html = index_template.render(notebooks=notebooks)
-        
-        with open(os.path.join(self.output_dir, 'index.html'), 'w', encoding='utf-8') as f:
-            f.write(index_html)
-        
-        # Generate individual notebook pages
-        notebook_template = self.template_env.get_template('notebook.html')
+
+        # Render every page up front, then write the batch with a thread
+        # pool so the writes overlap in the kernel instead of paying one
+        # serial open/write/close per page
+        pages = [(
+            os.path.join(self.output_dir, 'index.html'),
+            self._index_tmpl.render(notebooks=notebooks).encode('utf-8')
+        )]
         for notebook in notebooks:
-            notebook_html = notebook_template.render(notebook=notebook)
             output_path = os.path.join(
-                self.output_dir, 
+                self.output_dir,
                 f"{notebook['name'].replace('.ipynb', '')}.html"
             )
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(notebook_html)
+            pages.append((output_path, str(self._notebook_page(notebook)).encode('utf-8')))
+
+        with ThreadPoolExecutor(max_workers=min(32, len(pages))) as executor:
+            list(executor.map(self._write_page, pages))
+
+    @staticmethod
+    def _write_page(page):
+        """
+        Write one rendered page to disk in a single binary write
+
+        :param page: Tuple of (output path, encoded HTML)
+        """
+        path, data = page
+        with open(path, 'wb') as f:
+            f.write(data)
 
 def main():
     generator = SiteGenerator()
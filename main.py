@@ -1,9 +1,64 @@
+import hashlib
+import html
 import os
-import nbformat
+import re
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import diskcache
+import orjson
 import requests
-import github
 from flask import Flask, request, render_template
-from werkzeug.utils import secure_filename
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Stricter and cheaper than werkzeug's secure_filename: uploads must
+# already look like a plain notebook filename or they are rejected
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9_.\-]{1,128}\.ipynb$')
+
+# Response page skeleton, parsed once at import; LLM output is escaped
+# before substitution so stray markup can't break the page
+_RESPONSE_TPL = string.Template(
+    "<html>"
+    "<body>"
+    "<h1>ML Notebook Visualization</h1>"
+    "<h2>Project Overview</h2>"
+    "<p>$overview</p>"
+    "<h2>Technical Details</h2>"
+    "<p>$tech</p>"
+    "</body>"
+    "</html>"
+)
+
+def cell_source(cell):
+    """
+    Return a cell's source as a single string
+
+    The notebook format allows source to be either a string or a
+    list of lines.
+
+    :param cell: Cell dictionary from a parsed notebook
+    :return: Cell source text
+    """
+    src = cell.get('source', '')
+    return ''.join(src) if isinstance(src, list) else src
+
+# Master ML keyword pattern: one DFA pass per cell, with the named
+# group of each match identifying the component bucket directly
+_ML_KEYWORD_RE = re.compile(
+    r'(?P<preprocessing>scale|normalize|preprocess)'
+    r'|(?P<logistic>logistic_regression)'
+    r'|(?P<random_forest>random_forest)'
+    r'|(?P<neural_network>neural_network|tensorflow)'
+    r'|(?P<training>model\.fit)'
+    r'|(?P<evaluation>accuracy_score|classification_report)',
+    re.IGNORECASE
+)
+_MODEL_TYPE_LABELS = {
+    'logistic': 'Logistic Regression',
+    'random_forest': 'Random Forest',
+    'neural_network': 'Neural Network'
+}
 
 class NotebookProcessor:
     def __init__(self, hf_api_token):
@@ -22,63 +77,113 @@ class NotebookProcessor:
             "Authorization": f"Bearer {self.hf_api_token}",
             "Content-Type": "application/json"
         }
+        # Persistent session so TLS handshakes are amortized across calls
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # urllib3's default method allowlist excludes POST, which
+                # is the only verb this session uses
+                allowed_methods=None
+            )
+        ))
+        # Explanations memoized by prompt hash so re-uploads of the same
+        # notebook skip the inference round-trip; the dict is the
+        # in-process layer, the disk cache survives restarts
+        self._explanation_cache = {}
+        self._hf_cache = diskcache.Cache('.hf_cache')
+
+    def load_from_bytes(self, raw):
+        """
+        Parse and structurally validate a notebook from raw bytes
+
+        :param raw: Notebook file contents
+        :return: Parsed notebook dictionary
+        :raises ValueError: If the bytes are not a valid notebook
+        """
+        try:
+            nb = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Notebook is not valid JSON: {e}")
+
+        # The payload may be valid JSON without being an object (e.g. a
+        # bare number or string), so type-check before any key access
+        if not isinstance(nb, dict) or not isinstance(nb.get('cells'), list):
+            raise ValueError("Notebook has no cells list")
+        return nb
+
+    def load(self, file_path):
+        """
+        Load and structurally validate a notebook in a single parse
+
+        :param file_path: Path to the notebook file
+        :return: Parsed notebook dictionary
+        :raises ValueError: If the file is not a valid notebook
+        """
+        with open(file_path, 'rb') as f:
+            return self.load_from_bytes(f.read())
 
     def validate_notebook(self, file_path):
         """
         Validate that the uploaded file is a valid Jupyter notebook
-        
+
         :param file_path: Path to the notebook file
         :return: Boolean indicating notebook validity
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                nb = nbformat.read(f, as_version=4)
+            self.load(file_path)
             return True
         except Exception as e:
             print(f"Notebook validation error: {e}")
             return False
 
-    def extract_notebook_content(self, file_path):
+    def extract_notebook_content(self, nb):
         """
         Extract and process notebook content
-        
-        :param file_path: Path to the notebook file
+
+        :param nb: Parsed notebook dictionary
         :return: Dictionary containing processed notebook information
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            nb = nbformat.read(f, as_version=4)
-        
+        ml_components = {
+            'preprocessing': [],
+            'model_type': None,
+            'training': False,
+            'evaluation': False
+        }
         processed_content = {
             'code_cells': [],
             'markdown_cells': [],
-            'outputs': [],
-            'ml_components': self._identify_ml_components(nb)
+            'ml_components': ml_components
         }
 
-        for cell in nb.cells:
-            if cell.cell_type == 'code':
-                processed_content['code_cells'].append(cell.source)
-                processed_content['outputs'].append(
-                    self._process_cell_output(cell)
-                )
-            elif cell.cell_type == 'markdown':
-                processed_content['markdown_cells'].append(cell.source)
+        # Single pass over the cells: content extraction and ML component
+        # detection share the same iteration and source string
+        scan_done = False
+        for cell in nb['cells']:
+            cell_type = cell.get('cell_type')
+            if cell_type == 'code':
+                source = cell_source(cell)
+                processed_content['code_cells'].append(source)
+                if not scan_done:
+                    self._scan_source(source, ml_components)
+                    scan_done = self._components_complete(ml_components)
+            elif cell_type == 'markdown':
+                processed_content['markdown_cells'].append(cell_source(cell))
 
         return processed_content
 
     def _identify_ml_components(self, notebook):
         """
         Identify machine learning components in the notebook
-        
-        :param notebook: Parsed notebook object
+
+        :param notebook: Parsed notebook dictionary
         :return: Dictionary of identified ML components
         """
-        ml_keywords = [
-            'train_test_split', 'model.fit', 'predict', 
-            'accuracy_score', 'classification_report',
-            'sklearn', 'tensorflow', 'torch', 'keras'
-        ]
-        
         ml_components = {
             'preprocessing': [],
             'model_type': None,
@@ -86,42 +191,80 @@ class NotebookProcessor:
             'evaluation': False
         }
 
-        for cell in notebook.cells:
-            if cell.cell_type == 'code':
-                cell_text = cell.source.lower()
-                
-                # Detect preprocessing
-                if any(keyword in cell_text for keyword in ['scale', 'normalize', 'preprocess']):
-                    ml_components['preprocessing'].append(cell.source)
-                
-                # Detect model types
-                if 'logistic_regression' in cell_text:
-                    ml_components['model_type'] = 'Logistic Regression'
-                elif 'random_forest' in cell_text:
-                    ml_components['model_type'] = 'Random Forest'
-                elif 'neural_network' in cell_text or 'tensorflow' in cell_text:
-                    ml_components['model_type'] = 'Neural Network'
-                
-                # Detect training and evaluation
-                if 'model.fit' in cell_text:
-                    ml_components['training'] = True
-                if 'accuracy_score' in cell_text or 'classification_report' in cell_text:
-                    ml_components['evaluation'] = True
+        for cell in notebook.get('cells', []):
+            if cell.get('cell_type') == 'code':
+                self._scan_source(cell_source(cell), ml_components)
+                if self._components_complete(ml_components):
+                    break
 
         return ml_components
 
-    def _process_cell_output(self, cell):
+    @staticmethod
+    def _components_complete(ml_components):
         """
-        Process and sanitize cell outputs
-        
-        :param cell: Notebook cell
-        :return: Processed output or None
+        Check whether every ML component bucket has been filled
+
+        Once true, scanning further cells cannot change the result.
+
+        :param ml_components: Component dictionary
+        :return: Boolean indicating all buckets are set
         """
-        if hasattr(cell, 'outputs') and cell.outputs:
-            for output in cell.outputs:
-                if output.output_type in ['stream', 'display_data', 'execute_result']:
-                    return output
-        return None
+        return bool(
+            ml_components['training']
+            and ml_components['evaluation']
+            and ml_components['model_type']
+            and ml_components['preprocessing']
+        )
+
+    def _scan_source(self, source, ml_components):
+        """
+        Scan one code cell's source and update the ML component buckets
+
+        :param source: Cell source text
+        :param ml_components: Component dictionary to update in place
+        """
+        preprocessing_seen = False
+        for match in _ML_KEYWORD_RE.finditer(source):
+            group = match.lastgroup
+            if group == 'preprocessing':
+                if not preprocessing_seen:
+                    ml_components['preprocessing'].append(source)
+                    preprocessing_seen = True
+            elif group in _MODEL_TYPE_LABELS:
+                ml_components['model_type'] = _MODEL_TYPE_LABELS[group]
+            else:
+                ml_components[group] = True
+
+    @staticmethod
+    def _truncate_cells(cells, max_chars=3000):
+        """
+        Trim cell sources to a combined character budget
+
+        Shorter cells keep their full text and their unused share of the
+        budget is redistributed to the longer ones, so a single huge cell
+        can't crowd the others out of the prompt.
+
+        :param cells: List of cell source strings
+        :param max_chars: Combined character budget
+        :return: List of possibly truncated cell sources
+        """
+        if sum(len(cell) for cell in cells) <= max_chars:
+            return list(cells)
+
+        budgets = [0] * len(cells)
+        remaining = max_chars
+        n_left = len(cells)
+        # Allocate shortest-first so slack flows to the longer cells
+        for i in sorted(range(len(cells)), key=lambda i: len(cells[i])):
+            budgets[i] = min(len(cells[i]), remaining // n_left)
+            remaining -= budgets[i]
+            n_left -= 1
+
+        return [
+            cell if len(cell) <= budget
+            else cell[:budget] + '...[truncated]...'
+            for cell, budget in zip(cells, budgets)
+        ]
 
     def generate_explanation(self, content):
         """
@@ -130,222 +273,405 @@ class NotebookProcessor:
         :param content: Processed notebook content
         :return: Generated explanations
         """
-        def query_hf_api(prompt):
-            """
-            Helper function to query Hugging Face Inference API
-            
-            :param prompt: Input prompt for text generation
-            :return: Generated text
-            """
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": 250,
-                    "return_full_text": False
-                }
-            }
-            
-            try:
-                response = requests.post(
-                    self.hf_inference_url, 
-                    headers=self.headers, 
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json()[0]['generated_text']
-            except Exception as e:
-                print(f"HF API Error: {e}")
-                return "Unable to generate explanation due to API error."
-
-        # Generate project overview
         overview_prompt = (
             f"Provide a concise, beginner-friendly overview of this machine learning project. "
             f"Project details: {content['ml_components']}"
         )
-        overview = query_hf_api(overview_prompt)
-
-        # Generate technical explanation
         technical_prompt = (
             f"Explain the technical implementation of this machine learning solution in a clear, "
             f"accessible manner. Break down key code components and their purpose. "
-            f"Code snippets: {' '.join(content['code_cells'][:3])}"
+            f"Code snippets: {' '.join(self._truncate_cells(content['code_cells'][:3]))}"
         )
-        technical_details = query_hf_api(technical_prompt)
+
+        cache_key = hashlib.blake2b(
+            f"{overview_prompt}\x00{technical_prompt}".encode('utf-8'),
+            digest_size=16
+        ).digest()
+        cached = self._explanation_cache.get(cache_key)
+        if cached is None:
+            cached = self._hf_cache.get(cache_key)
+            if cached is not None:
+                self._explanation_cache[cache_key] = cached
+        if cached is not None:
+            return dict(cached)
+
+        # Batch both prompts into one request so the round-trip and
+        # inference queue wait are paid once
+        payload = {
+            "inputs": [overview_prompt, technical_prompt],
+            "parameters": {
+                "max_new_tokens": 250,
+                "return_full_text": False
+            }
+        }
+
+        try:
+            response = self._session.post(
+                self.hf_inference_url, json=payload, timeout=(5, 60)
+            )
+            if 400 <= response.status_code < 500:
+                # Model families that don't accept batched inputs reject
+                # the list with a 4xx; fall back to one request per prompt
+                overview = self._query_single(overview_prompt)
+                technical_details = self._query_single(technical_prompt)
+            else:
+                response.raise_for_status()
+                results = response.json()
+                if isinstance(results, list) and len(results) >= 2:
+                    overview = results[0]['generated_text']
+                    technical_details = results[1]['generated_text']
+                else:
+                    # 200 with an unexpected body shape; same fallback
+                    overview = self._query_single(overview_prompt)
+                    technical_details = self._query_single(technical_prompt)
+            # Only successful generations are cached
+            explanations = {
+                'overview': overview,
+                'technical_details': technical_details
+            }
+            self._explanation_cache[cache_key] = explanations
+            self._hf_cache.set(cache_key, explanations, expire=86400)
+        except Exception as e:
+            print(f"HF API Error: {e}")
+            overview = "Unable to generate explanation due to API error."
+            technical_details = overview
 
         return {
             'overview': overview,
             'technical_details': technical_details
         }
 
+    def _query_single(self, prompt):
+        """
+        Query the HF Inference API with a single prompt
+
+        :param prompt: Input prompt for text generation
+        :return: Generated text
+        """
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": 250,
+                "return_full_text": False
+            }
+        }
+        response = self._session.post(
+            self.hf_inference_url, json=payload, timeout=(5, 60)
+        )
+        response.raise_for_status()
+        return response.json()[0]['generated_text']
+
+# Static gh-pages index page, interned once at import time; the
+# notebook list is populated client-side from the contents API
+_INDEX_HTML = b"""<!DOCTYPE html>
+<html>
+    <head>
+        <title>Auto Notebook Visualizations</title>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; }
+            .container { max-width: 1200px; margin: 0 auto; }
+            .header { background: #f4f4f4; padding: 20px; border-radius: 5px; }
+            .notebook-list { list-style: none; padding: 0; }
+            .notebook-list li { margin: 10px 0; }
+            .notebook-list a {
+                text-decoration: none;
+                color: #0366d6;
+                padding: 10px;
+                display: block;
+                background: #f8f9fa;
+                border-radius: 4px;
+            }
+            .notebook-list a:hover { background: #e9ecef; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>ML Notebook Visualizations</h1>
+                <p>Generated visualizations of Machine Learning notebooks</p>
+            </div>
+            <ul class="notebook-list" id="notebook-list"></ul>
+        </div>
+        <script>
+            async function loadNotebooks() {
+                const pathParts = window.location.pathname.split('/');
+                const username = pathParts[1];
+                const repoName = pathParts[2];
+                const apiUrl = `https://api.github.com/repos/${username}/${repoName}/contents?ref=gh-pages`;
+
+                try {
+                    const response = await fetch(apiUrl);
+                    const files = await response.json();
+                    const notebooks = files.filter(f => f.name.endsWith('.html') && f.name !== 'index.html');
+
+                    const list = document.getElementById('notebook-list');
+                    if (notebooks.length === 0) {
+                        list.innerHTML = '<li>No notebooks available yet</li>';
+                        return;
+                    }
+
+                    notebooks.forEach(nb => {
+                        const li = document.createElement('li');
+                        const a = document.createElement('a');
+                        a.href = nb.name;
+                        a.textContent = nb.name.replace('.html', '');
+                        li.appendChild(a);
+                        list.appendChild(li);
+                    });
+                } catch (error) {
+                    console.error('Error loading notebooks:', error);
+                    document.getElementById('notebook-list').innerHTML =
+                        '<li>Error loading notebooks. Please try again later.</li>';
+                }
+            }
+
+            loadNotebooks();
+        </script>
+    </body>
+</html>"""
+
 class GitHubDeployer:
+    API_ROOT = "https://api.github.com"
+
     def __init__(self, github_token, repo_name):
         """
         Initialize GitHub deployment service
-        
+
         :param github_token: GitHub personal access token
         :param repo_name: Name of the GitHub repository
         """
-        self.g = github.Github(github_token)
         self.repo_name = repo_name
-        self.repo = self.g.get_repo(repo_name)
+        self._repo_api = f"{self.API_ROOT}/repos/{repo_name}"
+        # Talk to the REST API directly over a pooled session; the two
+        # deploy operations used here don't need PyGithub's object graph
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"token {github_token}",
+            "Accept": "application/vnd.github+json"
+        })
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # urllib3's default method allowlist excludes the POSTs
+                # and the ref PATCH used here; all of them are safe to
+                # repeat because the Git Data writes are content-addressed
+                # and the PATCH resends the same sha
+                allowed_methods=None
+            )
+        ))
+        # gh-pages head commit and tree, cached after the first deploy
+        # so subsequent batches skip the two lookup round-trips; the
+        # lock serializes deploys so concurrent uploads chain their
+        # commits instead of racing for the same parent
+        self._head_sha = None
+        self._head_tree = None
+        self._deploy_lock = threading.Lock()
+        # Fingerprint of the index.html last pushed to gh-pages
+        self._deployed_index_hash = None
         self.upload_dir = 'uploaded_notebooks'
-        self.template_dir = 'templates'
         os.makedirs(self.upload_dir, exist_ok=True)
-        os.makedirs(self.template_dir, exist_ok=True)
         self._create_index_html()  # Always create/update index.html
         self._ensure_gh_pages_branch()
 
+    def _get(self, path):
+        """
+        GET a repo API path and return the decoded JSON
+
+        :param path: Path below the repository API root
+        :return: Decoded response body
+        """
+        response = self._session.get(self._repo_api + path, timeout=(5, 30))
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, path, payload):
+        """
+        POST a JSON payload to a repo API path
+
+        :param path: Path below the repository API root
+        :param payload: JSON-serializable request body
+        :return: Decoded response body
+        """
+        response = self._session.post(
+            self._repo_api + path, json=payload, timeout=(5, 30)
+        )
+        response.raise_for_status()
+        return response.json()
+
     def _ensure_gh_pages_branch(self):
         """Create gh-pages branch if it doesn't exist"""
         try:
-            self.repo.get_branch("gh-pages")
-        except github.GithubException:
+            self._get("/branches/gh-pages")
+        except requests.HTTPError:
             # Create gh-pages branch
-            master = self.repo.get_branch("main")
-            self.repo.create_git_ref(ref="refs/heads/gh-pages", sha=master.commit.sha)
+            main_branch = self._get("/branches/main")
+            self._post("/git/refs", {
+                "ref": "refs/heads/gh-pages",
+                "sha": main_branch['commit']['sha']
+            })
             # Create initial index.html
             self._create_index_html()
 
     def _create_index_html(self):
         """Create index.html in the upload directory"""
-        # First create in templates if not exists
-        template_path = os.path.join(self.template_dir, 'index.html')
-        if not os.path.exists(template_path):
-            with open(template_path, 'w', encoding='utf-8') as f:
-                f.write("""<!DOCTYPE html>
-                <html>
-                    <head>
-                        <title>Auto Notebook Visualizations</title>
-                        <meta charset="UTF-8">
-                        <meta name="viewport" content="width=device-width, initial-scale=1">
-                        <style>
-                            body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; }
-                            .container { max-width: 1200px; margin: 0 auto; }
-                            .header { background: #f4f4f4; padding: 20px; border-radius: 5px; }
-                            .notebook-list { list-style: none; padding: 0; }
-                            .notebook-list li { margin: 10px 0; }
-                            .notebook-list a { 
-                                text-decoration: none;
-                                color: #0366d6;
-                                padding: 10px;
-                                display: block;
-                                background: #f8f9fa;
-                                border-radius: 4px;
-                            }
-                            .notebook-list a:hover { background: #e9ecef; }
-                        </style>
-                    </head>
-                    <body>
-                        <div class="container">
-                            <div class="header">
-                                <h1>ML Notebook Visualizations</h1>
-                                <p>Generated visualizations of Machine Learning notebooks</p>
-                            </div>
-                            <ul class="notebook-list" id="notebook-list"></ul>
-                        </div>
-                        <script>
-                            async function loadNotebooks() {
-                                const pathParts = window.location.pathname.split('/');
-                                const username = pathParts[1];
-                                const repoName = pathParts[2];
-                                const apiUrl = `https://api.github.com/repos/${username}/${repoName}/contents?ref=gh-pages`;
-                                
-                                try {
-                                    const response = await fetch(apiUrl);
-                                    const files = await response.json();
-                                    const notebooks = files.filter(f => f.name.endsWith('.html') && f.name !== 'index.html');
-                                    
-                                    const list = document.getElementById('notebook-list');
-                                    if (notebooks.length === 0) {
-                                        list.innerHTML = '<li>No notebooks available yet</li>';
-                                        return;
-                                    }
-                                    
-                                    notebooks.forEach(nb => {
-                                        const li = document.createElement('li');
-                                        const a = document.createElement('a');
-                                        a.href = nb.name;
-                                        a.textContent = nb.name.replace('.html', '');
-                                        li.appendChild(a);
-                                        list.appendChild(li);
-                                    });
-                                } catch (error) {
-                                    console.error('Error loading notebooks:', error);
-                                    document.getElementById('notebook-list').innerHTML = 
-                                        '<li>Error loading notebooks. Please try again later.</li>';
-                                }
-                            }
-                            
-                            loadNotebooks();
-                        </script>
-                    </body>
-                </html>""")
-        
-        # Copy from templates to upload directory
+        self._index_bytes = _INDEX_HTML
         index_path = os.path.join(self.upload_dir, 'index.html')
-        with open(template_path, 'r', encoding='utf-8') as src:
-            with open(index_path, 'w', encoding='utf-8') as dst:
-                dst.write(src.read())
+        with open(index_path, 'wb') as f:
+            f.write(_INDEX_HTML)
+
+    def _create_blob(self, content):
+        """
+        Upload one blob and return its sha
+
+        :param content: Blob text content
+        :return: Blob sha
+        """
+        blob = self._post("/git/blobs", {"content": content, "encoding": "utf-8"})
+        return blob['sha']
+
+    def deploy_many(self, files, message="Deploy notebook visualizations"):
+        """
+        Deploy several files to gh-pages in a single commit
+
+        Uses the Git Data API (blobs + tree + commit + ref update) so N
+        files cost one commit instead of N Contents API round-trips, and
+        no per-file existence lookups are needed.
+
+        Deploys are serialized on a lock: each commit must parent on the
+        previous one, so two in-flight batches would otherwise both
+        build on the same head and the second ref update would be
+        rejected as a non-fast-forward.
+
+        :param files: List of (repo_path, content) tuples
+        :param message: Commit message for the batch
+        """
+        with self._deploy_lock:
+            self._deploy_locked(files, message)
+
+    def _deploy_locked(self, files, message):
+        """
+        Perform one deploy batch; caller must hold the deploy lock
+
+        The lock only serializes deploys within one process; under
+        multiple gunicorn workers the branch can still advance between
+        our cached head and the ref update, so a rejected update is
+        retried once against the freshly fetched head.
+
+        :param files: List of (repo_path, content) tuples
+        :param message: Commit message for the batch
+        """
+        if self._head_sha is None:
+            self._resync_head()
+
+        # Blob uploads are independent API calls, so issue them
+        # concurrently before assembling the tree
+        with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+            blob_shas = list(executor.map(
+                lambda item: self._create_blob(item[1]),
+                files
+            ))
+
+        tree_entries = [
+            {
+                "path": repo_path,
+                "mode": "100644",
+                "type": "blob",
+                "sha": blob_sha
+            }
+            for (repo_path, _), blob_sha in zip(files, blob_shas)
+        ]
+
+        if not self._push_commit(tree_entries, message):
+            # Another worker advanced gh-pages past our cached head;
+            # resync and rebuild the commit, reusing the uploaded blobs
+            self._resync_head()
+            if not self._push_commit(tree_entries, message):
+                self._head_sha = None
+                self._head_tree = None
+                raise requests.HTTPError(
+                    "gh-pages ref update rejected twice; branch is moving"
+                )
+
+    def _resync_head(self):
+        """Fetch the current gh-pages head commit and tree shas"""
+        ref = self._get("/git/ref/heads/gh-pages")
+        self._head_sha = ref['object']['sha']
+        self._head_tree = self._get(f"/git/commits/{self._head_sha}")['tree']['sha']
+
+    def _push_commit(self, tree_entries, message):
+        """
+        Build a tree and commit on the cached head and update the ref
+
+        :param tree_entries: Git tree entry dictionaries for the batch
+        :param message: Commit message
+        :return: True on success, False if the ref update was rejected
+                 because the cached head is stale
+        """
+        tree = self._post("/git/trees", {
+            "base_tree": self._head_tree,
+            "tree": tree_entries
+        })
+        commit = self._post("/git/commits", {
+            "message": message,
+            "tree": tree['sha'],
+            "parents": [self._head_sha]
+        })
+
+        response = self._session.patch(
+            f"{self._repo_api}/git/refs/heads/gh-pages",
+            json={"sha": commit['sha']},
+            timeout=(5, 30)
+        )
+        if response.status_code == 422:
+            # Non-fast-forward: the cached head is stale
+            return False
+        if not response.ok:
+            self._head_sha = None
+            self._head_tree = None
+            response.raise_for_status()
+        self._head_sha = commit['sha']
+        self._head_tree = tree['sha']
+        return True
 
-    def deploy_content(self, content, notebook_name):
+    def deploy_content(self, content, html_name):
         """
         Deploy generated content to GitHub Pages
-        
+
         :param content: HTML content to deploy
-        :param notebook_name: Name of the source notebook
+        :param html_name: Target page filename on the gh-pages branch
         """
-        # First save locally
-        file_path = os.path.join(self.upload_dir, notebook_name.replace(".ipynb", ".html"))
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-            
-        # Then push to gh-pages branch
+        # Push to gh-pages as one commit; index.html only rides along
+        # when its content has actually changed
         try:
-            # Convert local path to repo path
-            repo_path = file_path.replace('\\', '/')
-            # Try to update existing file
-            try:
-                file = self.repo.get_contents(repo_path, ref="gh-pages")
-                self.repo.update_file(
-                    path=repo_path,
-                    message=f"Update {notebook_name} visualization",
-                    content=content,
-                    sha=file.sha,
-                    branch="gh-pages"
-                )
-            except github.GithubException:
-                # File doesn't exist, create new one
-                self.repo.create_file(
-                    path=repo_path,
-                    message=f"Add {notebook_name} visualization",
-                    content=content,
-                    branch="gh-pages"
-                )
-                
-            # Always update index.html
-            index_path = os.path.join(self.upload_dir, 'index.html')
-            with open(index_path, 'r', encoding='utf-8') as f:
-                index_content = f.read()
-            try:
-                index_file = self.repo.get_contents("index.html", ref="gh-pages")
-                self.repo.update_file(
-                    path="index.html",
-                    message="Update index.html",
-                    content=index_content,
-                    sha=index_file.sha,
-                    branch="gh-pages"
-                )
-            except github.GithubException:
-                self.repo.create_file(
-                    path="index.html",
-                    message="Create index.html",
-                    content=index_content,
-                    branch="gh-pages"
-                )
+            files = [(html_name, content)]
+            index_hash = hashlib.blake2b(self._index_bytes, digest_size=16).digest()
+            if index_hash != self._deployed_index_hash:
+                files.append(("index.html", self._index_bytes.decode('utf-8')))
+            self.deploy_many(files, message=f"Deploy {html_name}")
+            self._deployed_index_hash = index_hash
         except Exception as e:
             print(f"Error pushing to gh-pages: {e}")
             raise
 
+def _save_bytes(filepath, raw):
+    """
+    Persist raw upload bytes to disk
+
+    :param filepath: Destination path
+    :param raw: File contents
+    """
+    try:
+        with open(filepath, 'wb') as f:
+            f.write(raw)
+    except OSError as e:
+        print(f"Error saving upload {filepath}: {e}")
+
 def create_flask_app(notebook_processor, github_deployer):
     """
     Create Flask web application for notebook upload and processing
@@ -357,6 +683,23 @@ def create_flask_app(notebook_processor, github_deployer):
     app = Flask(__name__)
     app.config['UPLOAD_FOLDER'] = notebook_processor.upload_dir
 
+    # Deploys run on a background queue so the HTTP response does not
+    # block on GitHub round-trips. Status lives in a disk cache so
+    # /status polls work across gunicorn workers; the futures dict only
+    # tracks in-flight deploys for the queue cap and is pruned as they
+    # finish
+    deploy_executor = ThreadPoolExecutor(max_workers=4)
+    deploy_futures = {}
+    status_cache = diskcache.Cache('.deploy_status')
+
+    def _run_deploy(name, html_content, html_name):
+        try:
+            github_deployer.deploy_content(html_content, html_name)
+        except Exception:
+            status_cache.set(name, 'failed', expire=86400)
+            raise
+        status_cache.set(name, 'deployed', expire=86400)
+
     @app.route('/', methods=['GET', 'POST'])
     def upload_notebook():
         if request.method == 'POST':
@@ -366,33 +709,56 @@ def create_flask_app(notebook_processor, github_deployer):
             file = request.files['notebook']
             if file.filename == '':
                 return 'No selected file', 400
-            
-            filename = secure_filename(file.filename)
+
+            if not _SAFE_NAME.match(file.filename):
+                return 'Invalid notebook filename', 400
+            filename = file.filename
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-
-            if notebook_processor.validate_notebook(filepath):
-                content = notebook_processor.extract_notebook_content(filepath)
-                explanations = notebook_processor.generate_explanation(content)
-                
-                # Generate web page (simplified for this example)
-                html_content = f"""
-                <html>
-                    <body>
-                        <h1>ML Notebook Visualization</h1>
-                        <h2>Project Overview</h2>
-                        <p>{explanations['overview']}</p>
-                        <h2>Technical Details</h2>
-                        <p>{explanations['technical_details']}</p>
-                    </body>
-                </html>
-                """
-                
-                github_deployer.deploy_content(html_content, filename)
-                return 'Notebook processed and deployed successfully!', 200
-            else:
+
+            # Parse straight from the upload buffer; the file is only
+            # persisted to disk off the request path
+            raw = file.read()
+            try:
+                nb = notebook_processor.load_from_bytes(raw)
+            except ValueError:
                 return 'Invalid notebook', 400
 
+            threading.Thread(
+                target=_save_bytes, args=(filepath, raw), daemon=True
+            ).start()
+
+            content = notebook_processor.extract_notebook_content(nb)
+            explanations = notebook_processor.generate_explanation(content)
+
+            # Generate web page (simplified for this example)
+            html_content = _RESPONSE_TPL.substitute(
+                overview=html.escape(explanations['overview']),
+                tech=html.escape(explanations['technical_details'])
+            )
+
+            for name in [n for n, f in deploy_futures.items() if f.done()]:
+                del deploy_futures[name]
+            if len(deploy_futures) >= 32:
+                return 'Deploy queue full, try again later', 503
+
+            html_name = filename[:-6] + '.html'
+            status_cache.set(filename, 'deploying', expire=86400)
+            deploy_futures[filename] = deploy_executor.submit(
+                _run_deploy, filename, html_content, html_name
+            )
+            return 'Notebook accepted for deployment', 202
+
+    @app.route('/status/<name>')
+    def deploy_status(name):
+        status = status_cache.get(name)
+        if status is None:
+            return 'Unknown notebook', 404
+        if status == 'deploying':
+            return 'Deploying', 202
+        if status == 'failed':
+            return 'Deploy failed', 500
+        return 'Deployed', 200
+
     return app
 
 def main():
@@ -406,7 +772,12 @@ def main():
     # Enable GitHub Pages in the repository settings if not already enabled
     
     app = create_flask_app(notebook_processor, github_deployer)
-    app.run(debug=True)
+    if os.getenv('FLASK_DEV'):
+        # Werkzeug's debug server is single-threaded and serializes
+        # every upload; only use it for local development
+        app.run(debug=True)
+    else:
+        app.run(threaded=True)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
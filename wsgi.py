@@ -0,0 +1,18 @@
+"""
+WSGI entry point for production serving
+
+Run with a multi-worker threaded server so concurrent uploads are
+handled in parallel, e.g.:
+
+    gunicorn -w 4 -k gthread --threads 8 wsgi:app
+"""
+import os
+
+from main import NotebookProcessor, GitHubDeployer, create_flask_app
+
+notebook_processor = NotebookProcessor(os.getenv('HF_API_TOKEN'))
+github_deployer = GitHubDeployer(
+    os.getenv('GITHUB_TOKEN'),
+    os.getenv('GITHUB_REPO', 'praykar/autonotebook')
+)
+app = create_flask_app(notebook_processor, github_deployer)